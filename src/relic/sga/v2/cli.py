@@ -1,5 +1,6 @@
 import json
 import os
+import shutil
 import typing
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
@@ -16,18 +17,20 @@ from relic.sga.v2.serialization import essence_fs_serializer as v2_serializer
 _CHUNK_SIZE = 1024 * 1024 * 4  # 4 MiB
 
 
+_STORAGE_TYPE_ALIASES: Dict[str, StorageType] = {
+    "STORE": StorageType.STORE,
+    "BUFFER": StorageType.BUFFER_COMPRESS,
+    "STREAM": StorageType.STREAM_COMPRESS,
+}
+
+
 def _resolve_storage_type(s: Optional[str]) -> StorageType:
-    _HELPER = {
-        "STORE": StorageType.STORE,
-        "BUFFER": StorageType.BUFFER_COMPRESS,
-        "STREAM": StorageType.STREAM_COMPRESS,
-    }
     if s is None:
         return StorageType.STORE
 
     s = s.upper()
-    if s in _HELPER:
-        return _HELPER[s]
+    if s in _STORAGE_TYPE_ALIASES:
+        return _STORAGE_TYPE_ALIASES[s]
     else:
         return StorageType[s]
 
@@ -139,11 +142,9 @@ class RelicSgaPackV2Cli(CliPlugin):
                         parent, file = os.path.split(path_in_sga)
                         with sga_drive.makedirs(parent, recreate=True) as folder:
                             with folder.openbin(file, "w") as packed_file:
-                                while True:
-                                    buffer = unpacked_file.read(_CHUNK_SIZE)
-                                    if len(buffer) == 0:
-                                        break
-                                    packed_file.write(buffer)
+                                shutil.copyfileobj(
+                                    unpacked_file, packed_file, _CHUNK_SIZE
+                                )
                         sga_drive.setinfo(
                             path_in_sga, {"essence": {"storage_type": storage}}
                         )
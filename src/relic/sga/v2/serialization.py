@@ -3,17 +3,21 @@ Binary Serializers for Relic's SGA-V2
 """
 from __future__ import annotations
 
+import hashlib
 import time
 import zlib
 from dataclasses import dataclass
-from typing import BinaryIO, Dict, Tuple, cast, Any
+from io import BytesIO
+from operator import attrgetter
+from typing import BinaryIO, Dict, Tuple, cast, Any, Optional, List
 
 from fs.base import FS
+from fs.info import Info
 from relic.core.errors import MismatchError
 from relic.sga.core import serialization as _s
 from relic.sga.core.definitions import StorageType
 from relic.sga.core.filesystem import registry
-from relic.sga.core.protocols import StreamSerializer
+from relic.sga.core.protocols import StreamSerializer, T
 from relic.sga.core.serialization import (
     FileDef,
     ArchivePtrs,
@@ -44,38 +48,53 @@ class FileDefSerializer(StreamSerializer[FileDef]):
     INT2STORAGE: Dict[int, StorageType] = {
         value: key for key, value in STORAGE2INT.items()
     }  # reverse the dictionary
+    # Fetches every packed field in one C-level call, in layout order
+    _PACKED_FIELDS = attrgetter(
+        "name_pos", "storage_type", "data_pos", "length_in_archive", "length_on_disk"
+    )
 
     def __init__(self, layout: Struct):
         self.layout = layout
 
+    def _from_fields(
+        self,
+        name_pos: int,
+        storage_type_val: int,
+        data_pos: int,
+        length_in_archive: int,
+        length_on_disk: int,
+    ) -> FileDef:
+        storage_type: StorageType = self.INT2STORAGE[storage_type_val]
+        # Called once per file; positional args skip keyword binding in the generated __init__
+        return FileDef(
+            name_pos, data_pos, length_on_disk, length_in_archive, storage_type
+        )
+
     def unpack(self, stream: BinaryIO) -> FileDef:
         """Unpacks a File Definition from the stream."""
-        storage_type_val: int
+        return self._from_fields(*self.layout.unpack_stream(stream))
+
+    def unpack_many(self, buffer: bytes) -> List[FileDef]:
+        """Unpacks a block of consecutive File Definitions."""
+        return [
+            self._from_fields(*fields) for fields in self.layout.iter_unpack(buffer)
+        ]
+
+    def pack(self, stream: BinaryIO, value: FileDef) -> int:
+        """Packs a File Definition into the stream."""
         (
             name_pos,
-            storage_type_val,
+            storage_type,
             data_pos,
             length_in_archive,
             length_on_disk,
-        ) = self.layout.unpack_stream(stream)
-        storage_type: StorageType = self.INT2STORAGE[storage_type_val]
-        return FileDef(
-            name_pos=name_pos,
-            data_pos=data_pos,
-            length_on_disk=length_on_disk,
-            length_in_archive=length_in_archive,
-            storage_type=storage_type,
-        )
-
-    def pack(self, stream: BinaryIO, value: FileDef) -> int:
-        """Packs a File Definition into the stream."""
-        storage_type = self.STORAGE2INT[value.storage_type]
+        ) = self._PACKED_FIELDS(value)
         args = (
-            value.name_pos,
-            storage_type,
-            value.data_pos,
-            value.length_in_archive,
-            value.length_on_disk,
+            name_pos,
+            self.STORAGE2INT[storage_type],
+            data_pos,
+            length_in_archive,
+            length_on_disk,
         )
         packed: int = self.layout.pack_stream(stream, *args)
         return packed
@@ -142,6 +161,11 @@ class ArchiveHeaderSerializer(StreamSerializer[MetaBlock]):
 FILE_MD5_EIGEN = b"E01519D6-2DB7-4640-AF54-0A23319C56C3"
 HEADER_MD5_EIGEN = b"DFC9AF62-FC1B-4180-BC27-11CCE87D3EFF"
 
+# File data headers store their 'modified' timestamp & crc32 as 4 byte little-endian ints
+_uint32_layout = Struct("<I")
+_int32_layout = Struct("<i")
+_UNKNOWN_MODIFIED: int = _uint32_layout.unpack(b"UNK\0")[0]
+
 
 def assemble_meta(_: BinaryIO, header: MetaBlock, __: None) -> Dict[str, object]:
     """Extracts information from the meta-block to a dictionary the FS can store."""
@@ -161,6 +185,23 @@ def disassemble_meta(
     return meta, None
 
 
+def _read_md5(helper: _s.Md5ChecksumHelper, stream: BinaryIO) -> bytes:
+    """
+    Reads the md5 described by the helper.
+
+    In-memory streams (the serializer writes archives via a BytesIO) are hashed straight from their buffer in one call,
+    other streams fall back to the helper's chunked read.
+    """
+    if not isinstance(stream, BytesIO):
+        return helper.read(stream)
+    md5 = hashlib.md5(helper.eigen) if helper.eigen is not None else hashlib.md5()
+    with stream.getbuffer() as buffer:
+        end = len(buffer) if helper.size is None else helper.start + helper.size
+        with buffer[helper.start : end] as region:
+            md5.update(region)
+    return md5.digest()
+
+
 def recalculate_md5(stream: BinaryIO, meta: MetaBlock) -> None:
     """
     Recalculates file and header
@@ -178,8 +219,8 @@ def recalculate_md5(stream: BinaryIO, meta: MetaBlock) -> None:
         size=meta.ptrs.header_size,
         eigen=HEADER_MD5_EIGEN,
     )
-    meta.file_md5 = file_md5_helper.read()
-    meta.header_md5 = header_md5_helper.read()
+    meta.file_md5 = _read_md5(file_md5_helper, stream)
+    meta.header_md5 = _read_md5(header_md5_helper, stream)
 
 
 def meta2def(meta: Dict[str, object]) -> FileDef:
@@ -192,9 +233,19 @@ def meta2def(meta: Dict[str, object]) -> FileDef:
 
 
 class _AssemblerV2(FSAssembler[FileDef]):
-    def assemble_file(self, parent_dir: FS, file_def: FileDef) -> None:
-        super().assemble_file(parent_dir, file_def)
+    def read_toc_part(
+        self,
+        toc_info: Tuple[int, int],
+        serializer: StreamSerializer[T],
+    ) -> List[T]:
+        if not isinstance(serializer, FileDefSerializer):
+            return super().read_toc_part(toc_info, serializer)
+        # File records are fixed-size; pull the whole block with one read and decode it in one pass
+        self.stream.seek(self.ptrs.header_pos + toc_info[0])
+        block = self.stream.read(serializer.layout.size * toc_info[1])
+        return cast(List[T], serializer.unpack_many(block))
 
+    def assemble_file(self, parent_dir: FS, file_def: FileDef) -> None:
         # Still hate this, but might as well reuse it
         _HEADER_SIZE = (
             256 + 8
@@ -216,15 +267,29 @@ class _AssemblerV2(FSAssembler[FileDef]):
             != StorageType.STORE,  # self.decompress_files,
         )
 
+        # Mirrors FSAssembler.assemble_file, but keeps the payload around
+        #   so the CRC check can reuse it instead of re-reading (and re-inflating) it from the archive
+        data = lazy_info_decomp.read()
+        essence_meta: Dict[str, object] = {"storage_type": int(file_def.storage_type)}
+        file_meta = self.build_file_meta(file_def)
+        if file_meta is not None:
+            essence_meta.update(file_meta)
+
+        file_name = self.names[file_def.name_pos]
+        with parent_dir.open(file_name, "wb") as file:
+            file.write(data)
+        parent_dir.setinfo(file_name, {ESSENCE_NAMESPACE: essence_meta})
+
         def _generate_crc32() -> bytes:
-            return zlib.crc32(lazy_info_decomp.read()).to_bytes(
-                4, "little", signed=False
-            )
-
-        def _set_info(_name: str, _modified: int, _crc32: bytes) -> None:
-            essence_info: Dict[str, Any] = dict(
-                parent_dir.getinfo(_name, [ESSENCE_NAMESPACE]).raw[ESSENCE_NAMESPACE]
-            )
+            crc32_buffer: bytes = _uint32_layout.pack(zlib.crc32(data))
+            return crc32_buffer
+
+        def _set_info(
+            _name: str, _modified: int, _crc32: bytes, _info: Optional[Info] = None
+        ) -> None:
+            if _info is None:
+                _info = parent_dir.getinfo(_name, [ESSENCE_NAMESPACE])
+            essence_info: Dict[str, Any] = dict(_info.raw[ESSENCE_NAMESPACE])
             essence_info["name"] = _name
             essence_info["modified"] = _modified
             essence_info["crc32"] = _crc32
@@ -234,12 +299,15 @@ class _AssemblerV2(FSAssembler[FileDef]):
         def _generate_metadata() -> None:
             name = self.names[file_def.name_pos]
 
-            info = parent_dir.getinfo(name, ["details"])
-            timestamp = info.get("details", "modified", time.time())
+            # One lookup for both namespaces; _set_info reuses the essence half
+            info = parent_dir.getinfo(name, ["details", ESSENCE_NAMESPACE])
+            timestamp = info.get("details", "modified", None)
+            if timestamp is None:  # Only read the clock when the FS has no timestamp
+                timestamp = time.time()
             modified = int(timestamp)  # .to_bytes(4, "little", signed=False)
 
             crc32 = _generate_crc32()
-            _set_info(name, modified, crc32)
+            _set_info(name, modified, crc32, info)
 
         if (
             lazy_data_header.jump_to < 0
@@ -259,10 +327,7 @@ class _AssemblerV2(FSAssembler[FileDef]):
                     if name != expected_name:
                         _generate_metadata()  # assume invalid metadata block
                     else:
-                        modified_buffer: bytes = data_header[256:260]
-                        modified = int.from_bytes(
-                            modified_buffer, "little", signed=False
-                        )
+                        modified: int = _uint32_layout.unpack_from(data_header, 256)[0]
                         crc32 = data_header[260:264]
                         crc32_generated = _generate_crc32()
 
@@ -283,17 +348,20 @@ class _DisassassemblerV2(FSDisassembler[FileDef]):
         with container_fs.open(file_name, "rb") as handle:
             data = handle.read()
 
-        metadata = dict(container_fs.getinfo(file_name, ["essence"]).raw["essence"])
+        metadata = cast(
+            Dict[str, object],
+            container_fs.getinfo(file_name, ["essence"]).raw["essence"],
+        )
 
         file_def: FileDef = self.meta2def(metadata)
         _storage_type_value: int = metadata["storage_type"]  # type: ignore
         storage_type = StorageType(_storage_type_value)
         if storage_type == StorageType.STORE:
             store_data = data
-        elif storage_type in [
+        elif storage_type in (
             StorageType.BUFFER_COMPRESS,
             StorageType.STREAM_COMPRESS,
-        ]:
+        ):
             store_data = zlib.compress(
                 data, level=9
             )  # TODO process in chunks for large files
@@ -308,16 +376,14 @@ class _DisassassemblerV2(FSDisassembler[FileDef]):
             file_name, self.name_stream, self.flat_names
         )
 
-        name_buffer = bytearray(b"\0" * 256)
-        name_buffer[0 : len(file_name)] = file_name.encode("ascii")
-        _name_buffer_pos = _write_data(name_buffer, self.data_stream)
+        name_buffer = file_name.encode("ascii").ljust(256, b"\0")
         uncompressed_crc = zlib.crc32(data)
         # compressed_crc = zlib.crc32(store_data)
-        if "modified" in metadata and metadata["modified"] != int.from_bytes(
-            b"UNK\0", "little", signed=False
+        if (
+            "modified" in metadata and metadata["modified"] != _UNKNOWN_MODIFIED
         ):  # handle my unknown case ~ UNK\0 resolves to 1970, so I don't think we need to worry about that
             timestamp: int = metadata["modified"]  # type: ignore
-            timestamp_buffer = timestamp.to_bytes(4, "little", signed=True)
+            timestamp_buffer = _int32_layout.pack(timestamp)
 
             # if creation/modification are different, use the new timestamp
             # Cumbersome, but allows header MD5s to invalidate
@@ -326,18 +392,21 @@ class _DisassassemblerV2(FSDisassembler[FileDef]):
             created = info.get("details", "created", None)
             if modified is not None and created is not None:
                 if int(modified) - int(created) != 0:
-                    timestamp_buffer = int(modified).to_bytes(4, "little", signed=False)
+                    timestamp_buffer = _uint32_layout.pack(int(modified))
 
         else:
             info = container_fs.getinfo(file_name, ["details"])
-            timestamp: float = info.get("details", "modified", time.time())  # type: ignore
-            timestamp_buffer = int(timestamp).to_bytes(4, "little", signed=False)
+            timestamp: float = info.get("details", "modified", None)  # type: ignore
+            if timestamp is None:
+                timestamp = time.time()
+            timestamp_buffer = _uint32_layout.pack(int(timestamp))
 
-        _unk_buffer_pos = _write_data(timestamp_buffer, self.data_stream)
-
-        _crc_buffer_pos = _write_data(
-            uncompressed_crc.to_bytes(4, "little", signed=False), self.data_stream
+        crc_buffer = _uint32_layout.pack(
+            uncompressed_crc
         )  # should always recalc the crc, regardless of the cached value in metadata
+
+        # The header's position is never used; write it in one call instead of tracking each field
+        self.data_stream.write(name_buffer + timestamp_buffer + crc_buffer)
         file_def.data_pos = _write_data(store_data, self.data_stream)
 
         return file_def
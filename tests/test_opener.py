@@ -117,7 +117,7 @@ _sample_paths = [
     "test:/String Samples/BUFFER.txt",
     "test:/String Samples/STREAM.txt",
 ]
-_sample_file_descriptions = [_store_txt]
+_sample_file_descriptions = [_store_txt, _buffer_txt, _stream_txt]
 _sample_meta = [
     {
         "name": "SampleSGA-v2",
@@ -0,0 +1,113 @@
+import hashlib
+import os.path
+import zlib
+from io import BytesIO
+from typing import List
+
+import pytest
+from relic.sga.core import MagicWord, Version
+from relic.sga.core.filesystem import EssenceFS
+from relic.sga.core.serialization import FileDef, Md5ChecksumHelper
+
+from relic.sga.v2.serialization import (
+    essence_fs_serializer,
+    FILE_MD5_EIGEN,
+    HEADER_MD5_EIGEN,
+    _meta_header_serializer,
+    _read_md5,
+    _toc_header_serializer,
+    _file_serializer,
+)
+
+_DATA_HEADER_SIZE = 256 + 8
+
+
+def _get_sample_file(path: str) -> str:
+    return os.path.abspath(os.path.join(__file__, "../data", path))
+
+
+_SAMPLES = [
+    _get_sample_file("SampleSGA-v2.sga"),
+    _get_sample_file("SampleSGA-v2-Oct-15-2023.sga"),
+]
+
+
+def _read_file_defs(buffer: bytes) -> List[FileDef]:
+    with BytesIO(buffer) as stream:
+        MagicWord.read_magic_word(stream, advance=True)
+        Version.unpack(stream)
+        meta = _meta_header_serializer.unpack(stream)
+        stream.seek(meta.ptrs.header_pos)
+        toc = _toc_header_serializer.unpack(stream)
+        stream.seek(meta.ptrs.header_pos + toc.file_info[0])
+        file_defs = [_file_serializer.unpack(stream) for _ in range(toc.file_info[1])]
+        for file_def in file_defs:
+            # Make data_pos absolute; simplifies locating the file's data header
+            file_def.data_pos += meta.ptrs.data_pos
+        return file_defs
+
+
+def _corrupt_data_header_names(buffer: bytes) -> bytes:
+    corrupted = bytearray(buffer)
+    for file_def in _read_file_defs(buffer):
+        name_pos = file_def.data_pos - _DATA_HEADER_SIZE
+        corrupted[name_pos] = ord("?")  # Name no longer matches the TOC
+    return bytes(corrupted)
+
+
+def _walk_files(sga: EssenceFS):
+    for _, drive in sga.iterate_fs():
+        for path in drive.walk.files():
+            yield drive, path
+
+
+@pytest.mark.parametrize("src", argvalues=_SAMPLES, ids=_SAMPLES)
+def test_read_regenerates_invalid_data_headers(src: str):
+    with open(src, "rb") as handle:
+        buffer = _corrupt_data_header_names(handle.read())
+
+    sga = essence_fs_serializer.read(BytesIO(buffer))
+    files = list(_walk_files(sga))
+    assert len(files) > 0
+    for drive, path in files:
+        info = drive.getinfo(path, ["details", "essence"])
+        essence = info.raw["essence"]
+        data = drive.readbytes(path)
+        assert essence["name"] == info.name
+        assert essence["modified"] == int(info.raw["details"]["modified"])
+        assert essence["crc32"] == zlib.crc32(data).to_bytes(4, "little", signed=False)
+
+
+@pytest.mark.parametrize("src", argvalues=_SAMPLES, ids=_SAMPLES)
+def test_write_md5_matches_core_helper(src: str):
+    with open(src, "rb") as handle:
+        sga = essence_fs_serializer.read(handle)
+    with BytesIO() as stream:
+        essence_fs_serializer.write(stream, sga)
+        buffer = stream.getvalue()
+        stream.seek(0)
+        MagicWord.read_magic_word(stream, advance=True)
+        Version.unpack(stream)
+        meta = _meta_header_serializer.unpack(stream)
+        ptrs = meta.ptrs
+
+        file_helper = Md5ChecksumHelper(
+            expected=None, stream=stream, start=ptrs.header_pos, eigen=FILE_MD5_EIGEN
+        )
+        header_helper = Md5ChecksumHelper(
+            expected=None,
+            stream=stream,
+            start=ptrs.header_pos,
+            size=ptrs.header_size,
+            eigen=HEADER_MD5_EIGEN,
+        )
+        assert _read_md5(file_helper, stream) == file_helper.read(stream)
+        assert _read_md5(header_helper, stream) == header_helper.read(stream)
+
+    header_end = ptrs.header_pos + ptrs.header_size
+    expected_file_md5 = hashlib.md5(FILE_MD5_EIGEN + buffer[ptrs.header_pos :])
+    expected_header_md5 = hashlib.md5(
+        HEADER_MD5_EIGEN + buffer[ptrs.header_pos : header_end]
+    )
+    assert meta.file_md5 == expected_file_md5.digest()
+    assert meta.header_md5 == expected_header_md5.digest()